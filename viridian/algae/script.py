@@ -95,7 +95,7 @@ def test() -> int:
         # Wait for a second to make sure viridian started
         sleep(1)
 
-        exit, output = viridian_cnt.exec_run(["poetry", "run", "pytest", "--log-cli-level=DEBUG", "test/"])
+        exit, output = viridian_cnt.exec_run(["poetry", "run", "pytest", "-n", "auto", "--log-level=DEBUG", "test/"])
         viridian_cnt.kill("SIGINT")
         viridian_cnt.wait()
 
@@ -1,19 +1,25 @@
 from enum import IntEnum
+from functools import lru_cache
+from os import urandom
+from struct import unpack_from
 from typing import Optional, Tuple
 
-from Crypto.Cipher import PKCS1_OAEP, ChaCha20_Poly1305
+from Crypto.Cipher import PKCS1_OAEP
+from Crypto.Cipher.PKCS1_OAEP import PKCS1OAEP_Cipher
 from Crypto.Hash import SHA256
 from Crypto.PublicKey import RSA
-from Crypto.Random import get_random_bytes
-from Crypto.Random.random import randint
+from nacl.bindings import crypto_aead_xchacha20poly1305_ietf_decrypt, crypto_aead_xchacha20poly1305_ietf_encrypt
+from nacl.exceptions import CryptoError
 
 _RSA_KEY_SIZE = 2048
 _RSA_KEY_EXPONENT = 65537
 _CHACHA_NONCE_LENGTH = 24
 _CHACHA_TAG_LENGTH = 16
+_CHACHA_NONCE_POOL_SIZE = 64
 
-_RSA_KEY = RSA.generate(_RSA_KEY_SIZE, get_random_bytes, _RSA_KEY_EXPONENT)
 _CHACHA_KEY: Optional[bytes] = None
+_CHACHA_NONCE_POOL = bytes()
+_CHACHA_NONCE_OFFSET = 0
 
 _MESSAGE_HEADER_LEN = 3
 _MESSAGE_GRAVITY = 4
@@ -37,13 +43,42 @@ class Status(IntEnum):
         return cls.UNDEF
 
 
+def _random_number(minimum: int, maximum: int) -> int:
+    span = maximum - minimum
+    bits = span.bit_length()
+    size, mask = (bits + 7) // 8, (1 << bits) - 1
+    while True:
+        value = int.from_bytes(urandom(size), "big") & mask
+        if value <= span:
+            return minimum + value
+
+
+def _next_nonce() -> bytes:
+    global _CHACHA_NONCE_POOL, _CHACHA_NONCE_OFFSET
+    if _CHACHA_NONCE_OFFSET >= len(_CHACHA_NONCE_POOL):
+        _CHACHA_NONCE_POOL, _CHACHA_NONCE_OFFSET = urandom(_CHACHA_NONCE_LENGTH * _CHACHA_NONCE_POOL_SIZE), 0
+    start, end = _CHACHA_NONCE_OFFSET, _CHACHA_NONCE_OFFSET + _CHACHA_NONCE_LENGTH
+    _CHACHA_NONCE_OFFSET = end
+    return _CHACHA_NONCE_POOL[start:end]
+
+
+# RSA keys are only needed in VPN mode, so they are generated on first use
+@lru_cache(maxsize=None)
+def _rsa_key() -> RSA.RsaKey:
+    return RSA.generate(_RSA_KEY_SIZE, urandom, _RSA_KEY_EXPONENT)
+
+
+@lru_cache(maxsize=None)
+def _rsa_cipher() -> PKCS1OAEP_Cipher:
+    return PKCS1_OAEP.new(_rsa_key(), SHA256)
+
+
 def decrypt_rsa(data: bytes) -> bytes:
-    cipher = PKCS1_OAEP.new(_RSA_KEY, SHA256)
-    return cipher.decrypt(data)
+    return _rsa_cipher().decrypt(data)
 
 
 def get_public_key() -> bytes:
-    return _RSA_KEY.public_key().export_key("DER")
+    return _rsa_key().public_key().export_key("DER")
 
 
 def initialize_symmetric(key: bytes) -> None:
@@ -54,19 +89,21 @@ def initialize_symmetric(key: bytes) -> None:
 def encrypt_symmetric(data: bytes) -> bytes:
     if _CHACHA_KEY is None:
         raise RuntimeError("Symmetric algorithm is not initialized with key!")
-    nonce = get_random_bytes(_CHACHA_NONCE_LENGTH)
-    cipher = ChaCha20_Poly1305.new(key=_CHACHA_KEY, nonce=nonce)
-    encryption, tag = cipher.encrypt_and_digest(data)
-    return nonce + encryption + tag
+    nonce = _next_nonce()
+    return nonce + crypto_aead_xchacha20poly1305_ietf_encrypt(data, None, nonce, _CHACHA_KEY)
 
 
+# Any malformed or unauthenticated packet is reported with ValueError
 def decrypt_symmetric(data: bytes) -> bytes:
     if _CHACHA_KEY is None:
         raise RuntimeError("Symmetric algorithm is not initialized with key!")
+    if len(data) < _CHACHA_NONCE_LENGTH + _CHACHA_TAG_LENGTH:
+        raise ValueError(f"Length of encrypted data ({len(data)}) is less than nonce and tag length ({_CHACHA_NONCE_LENGTH + _CHACHA_TAG_LENGTH})!")
     nonce, ciphertext = data[:_CHACHA_NONCE_LENGTH], data[_CHACHA_NONCE_LENGTH:]
-    cipher = ChaCha20_Poly1305.new(key=_CHACHA_KEY, nonce=nonce)
-    encryption, tag = ciphertext[:-_CHACHA_TAG_LENGTH], ciphertext[-_CHACHA_TAG_LENGTH:]
-    return cipher.decrypt_and_verify(encryption, tag)
+    try:
+        return crypto_aead_xchacha20poly1305_ietf_decrypt(ciphertext, None, nonce, _CHACHA_KEY)
+    except CryptoError as error:
+        raise ValueError("Encrypted data authentication failed!") from error
 
 
 def encode_message(status: Status, data: Optional[bytes] = None) -> bytes:
@@ -76,22 +113,26 @@ def encode_message(status: Status, data: Optional[bytes] = None) -> bytes:
     if length > available_space:
         raise RuntimeError(f"Length of data ({length}) is greater than max message length ({available_space})!")
 
-    random_length = randint(0, min(available_space - length, _SIZE_UINT_16))
-    prefix_length = randint(0, min(_SIZE_UINT_8, random_length))
+    random_length = _random_number(0, min(available_space - length, _SIZE_UINT_16))
+    prefix_length = _random_number(0, min(_SIZE_UINT_8 - _MESSAGE_GRAVITY, random_length))
 
-    pointer = (prefix_length + _MESSAGE_GRAVITY).to_bytes(1, "big")
-    prefix = get_random_bytes(_MESSAGE_GRAVITY - 1) + pointer + get_random_bytes(prefix_length)
-    content = status.value.to_bytes(1, "big") + length.to_bytes(2, "big") + data
-    postfix = get_random_bytes(random_length - prefix_length)
-    return prefix + content + postfix
+    offset = prefix_length + _MESSAGE_GRAVITY
+    payload = bytearray(urandom(_MESSAGE_GRAVITY + _MESSAGE_HEADER_LEN + length + random_length))
+    payload[_MESSAGE_GRAVITY - 1] = offset
+    payload[offset] = status.value
+
+    start, end = offset + 1, offset + 3
+    payload[start:end] = length.to_bytes(2, "big")
+    start, end = offset + 3, offset + 3 + length
+    payload[start:end] = data
+    return bytes(payload)
 
 
 def decode_message(data: bytes) -> Tuple[Status, Optional[bytes]]:
     offset = data[_MESSAGE_GRAVITY - 1]
     status = Status(data[offset])
 
-    start, end = offset + 1, offset + 3
-    length = int.from_bytes(data[start:end], "big")
+    (length,) = unpack_from(">H", data, offset + 1)
     if length == 0:
         return status, None
     else:
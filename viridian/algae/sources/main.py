@@ -1,6 +1,5 @@
 from argparse import ArgumentParser, ArgumentTypeError
 from ipaddress import IPv4Address
-from multiprocessing import current_process
 from signal import SIGINT, SIGTERM, signal
 from sys import argv, exit
 from typing import Sequence
@@ -54,8 +53,7 @@ def main(args: Sequence[str] = argv[1:]) -> None:
 
 def finish(_, __) -> None:  # type: ignore[no-untyped-def]
     global controller
-    if current_process().name == "MainProcess":
-        controller.break_control()
+    controller.break_control()
     exit(0)
 
 
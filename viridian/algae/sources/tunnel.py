@@ -1,8 +1,11 @@
 from fcntl import ioctl
 from ipaddress import IPv4Address
-from os import O_RDWR, getegid, geteuid, open, read, write
-from socket import AF_INET, SOCK_DGRAM, socket
+from logging import DEBUG
+from os import O_NONBLOCK, O_RDWR, close, getegid, geteuid, open, pipe, readv, write
+from selectors import EVENT_READ, DefaultSelector
+from socket import AF_INET, SOCK_DGRAM, if_nametoindex, socket
 from struct import pack
+from threading import Thread
 from typing import Tuple
 
 from colorama import Fore
@@ -21,11 +24,14 @@ _UNIX_IFF_NO_PI = 0x1000
 _UNIX_TUN_DEVICE = "/dev/net/tun"
 _UNIX_IFNAMSIZ = 16
 
+# Packets handled per direction before returning to select, so that neither direction starves the other
+_FORWARD_BATCH = 64
+
 
 def _create_tunnel(name: str) -> int:
     if len(name) > _UNIX_IFNAMSIZ:
         raise ValueError(f"Tunnel interface name ({name}) is too long!")
-    descriptor = open(_UNIX_TUN_DEVICE, O_RDWR)
+    descriptor = open(_UNIX_TUN_DEVICE, O_RDWR | O_NONBLOCK)
     tunnel_desc = pack("16sH", name.encode("ascii"), _UNIX_IFF_TUN | _UNIX_IFF_NO_PI)
     ioctl(descriptor, _UNIX_TUNSETIFF, tunnel_desc)
     ioctl(descriptor, _UNIX_TUNSETOWNER, geteuid())
@@ -41,12 +47,17 @@ class Tunnel:
         self._buffer = buff
         self._address = str(addr)
         self._sea_port = sea_port
+        self._caerulean = (self._address, self._sea_port)
 
         self._def_route, self._def_intf = "", ""
         self._def_ip = "127.0.0.1"
         self._operational = False
 
+        self._worker: Thread
+        self._wakeup_read, self._wakeup_write = -1, -1
+
         self._descriptor = _create_tunnel(name)
+        self._index = if_nametoindex(name)
         logger.info(f"Tunnel {Fore.BLUE}{self._name}{Fore.RESET} created (buffer: {Fore.BLUE}{buff}{Fore.RESET})")
 
     @property
@@ -61,9 +72,9 @@ class Tunnel:
         if self._operational:
             self.down()
         with IPRoute() as ip:
-            tunnel_dev = ip.link_lookup(ifname=self._name)[0]
-            ip.link("del", index=tunnel_dev)
-            logger.info(f"Tunnel {Fore.BLUE}{self._name}{Fore.RESET} deleted")
+            ip.link("del", index=self._index)
+        close(self._descriptor)
+        logger.info(f"Tunnel {Fore.BLUE}{self._name}{Fore.RESET} deleted")
 
     def _get_default_route(self) -> Tuple[str, str]:
         with IPRoute() as ip:
@@ -83,41 +94,89 @@ class Tunnel:
         logger.info(f"Default route saved (via {Fore.YELLOW}{self._def_route}{Fore.RESET} dev {Fore.YELLOW}{self._def_intf}{Fore.RESET})")
 
         with IPRoute() as ip:
-            tunnel_dev = ip.link_lookup(ifname=self._name)[0]
-            ip.link("set", index=tunnel_dev, mtu=self._mtu)
+            ip.link("set", index=self._index, mtu=self._mtu)
             logger.info(f"Tunnel MTU set to {Fore.BLUE}{self._mtu}{Fore.RESET}")
-            ip.addr("add", index=tunnel_dev, address=self._def_ip, mask=def_cidr)
+            ip.addr("add", index=self._index, address=self._def_ip, mask=def_cidr)
             logger.info(f"Tunnel IP address set to {Fore.BLUE}{self._def_ip}{Fore.RESET}")
-            ip.link("set", index=tunnel_dev, state="up")
+            ip.link("set", index=self._index, state="up")
             logger.info(f"Tunnel {Fore.GREEN}enabled{Fore.RESET}")
-            ip.route("replace", dst="default", gateway=self._def_ip, oif=tunnel_dev)
+            ip.route("replace", dst="default", gateway=self._def_ip, oif=self._index)
             logger.info(f"Tunnel set as default route (via {Fore.YELLOW}{self._def_ip}{Fore.RESET} dev {Fore.YELLOW}{self._name}{Fore.RESET})")
         self._operational = True
 
+        self._wakeup_read, self._wakeup_write = pipe()
+        self._worker = Thread(target=self._forward, name="forwarder", daemon=True)
+        self._worker.start()
+        logger.info(f"Tunnel worker {Fore.GREEN}started{Fore.RESET}")
+
     def down(self) -> None:
         with IPRoute() as ip:
-            tunnel_dev = ip.link_lookup(ifname=self._name)[0]
             default_dev = ip.link_lookup(ifname=self._def_intf)[0]
             ip.route("replace", dst="default", gateway=self._def_route, oif=default_dev)
             logger.info(f"Default route restored (via {Fore.YELLOW}{self._def_route}{Fore.RESET} dev {Fore.YELLOW}{self._def_intf}{Fore.RESET})")
-            ip.link("set", index=tunnel_dev, state="down")
+            ip.link("set", index=self._index, state="down")
             logger.info(f"Tunnel {Fore.GREEN}disabled{Fore.RESET}")
         self._operational = False
 
-    def send_to_caerulean(self) -> None:
-        with socket(AF_INET, SOCK_DGRAM) as gate:
-            gate.bind((self._def_ip, 0))
-            while self._operational:
-                packet = read(self._descriptor, self._buffer)
-                logger.debug(f"Sending {len(packet)} bytes to caerulean {self._address}:{self._sea_port}")
-                packet = packet if not self._encode else encrypt_symmetric(packet)
-                gate.sendto(packet, (self._address, self._sea_port))
-
-    def receive_from_caerulean(self) -> None:
-        with socket(AF_INET, SOCK_DGRAM) as gate:
-            gate.bind((self._def_ip, self._sea_port))
+        close(self._wakeup_write)
+        self._worker.join()
+        close(self._wakeup_read)
+        logger.info(f"Tunnel worker {Fore.GREEN}stopped{Fore.RESET}")
+
+    def _send_to_caerulean(self, gate: socket, buffer: bytearray) -> None:
+        buffers, view = [buffer], memoryview(buffer)
+        descriptor, encode, caerulean = self._descriptor, self._encode, self._caerulean
+        # No handler is attached by default, so per-packet records would only be built and discarded
+        send, debug = gate.send, logger.isEnabledFor(DEBUG) and logger.hasHandlers()
+        for _ in range(_FORWARD_BATCH):
+            length = readv(descriptor, buffers)
+            if debug:
+                logger.debug("Sending %d bytes to caerulean %s:%d", length, *caerulean)
+            packet = view[:length] if not encode else encrypt_symmetric(bytes(view[:length]))
+            send(packet)
+
+    def _receive_from_caerulean(self, gate: socket, buffer: bytearray) -> None:
+        view = memoryview(buffer)
+        descriptor, encode, caerulean = self._descriptor, self._encode, self._caerulean
+        recv_into, debug = gate.recv_into, logger.isEnabledFor(DEBUG) and logger.hasHandlers()
+        for _ in range(_FORWARD_BATCH):
+            length = recv_into(buffer)
+            try:
+                packet = view[:length] if not encode else decrypt_symmetric(bytes(view[:length]))
+            except ValueError:
+                if debug:
+                    logger.debug("Dropping %d bytes that failed decryption from %s:%d", length, *caerulean)
+                continue
+            if debug:
+                logger.debug("Receiving %d bytes from caerulean %s:%d", len(packet), *caerulean)
+            try:
+                write(descriptor, packet)
+            except OSError as error:
+                if debug:
+                    logger.debug("Dropping %d bytes that could not be written to tunnel: %s", len(packet), error)
+
+    def _forward(self) -> None:
+        outgoing, incoming = bytearray(self._mtu), bytearray(self._buffer)
+        with socket(AF_INET, SOCK_DGRAM) as sender, socket(AF_INET, SOCK_DGRAM) as receiver, DefaultSelector() as selector:
+            sender.bind((self._def_ip, 0))
+            sender.connect(self._caerulean)
+            receiver.bind((self._def_ip, self._sea_port))
+            receiver.setblocking(False)
+            selector.register(self._descriptor, EVENT_READ)
+            selector.register(receiver, EVENT_READ)
+            selector.register(self._wakeup_read, EVENT_READ)
+            select, descriptor = selector.select, self._descriptor
             while self._operational:
-                packet = gate.recv(self._buffer)
-                packet = packet if not self._encode else decrypt_symmetric(packet)
-                logger.debug(f"Receiving {len(packet)} bytes from caerulean {self._address}:{self._sea_port}")
-                write(self._descriptor, packet)
+                for key, _ in select():
+                    try:
+                        if key.fileobj is receiver:
+                            self._receive_from_caerulean(receiver, incoming)
+                        elif key.fileobj == descriptor:
+                            self._send_to_caerulean(sender, outgoing)
+                    except BlockingIOError:
+                        pass
+                    except ConnectionRefusedError:
+                        # An ICMP port-unreachable queued on the connected sender fails the next send, so that packet is lost too
+                        logger.debug("Caerulean %s:%d is not accepting packets", *self._caerulean)
+                    except OSError as error:
+                        logger.warning("Forwarding packet failed: %s", error)
@@ -1,25 +1,25 @@
+from asyncio import gather, run
+from functools import lru_cache
 from logging import getLogger
 from os import environ
-from random import choice, randint
-from re import compile
-from socket import AF_INET, SHUT_WR, SOCK_DGRAM, SOCK_STREAM, gethostbyname, socket
-from string import ascii_letters, digits
-from subprocess import check_output
-from time import sleep
-from typing import Generator, List
-from urllib.request import urlopen, urlretrieve
+from random import randint
+from secrets import token_hex
+from socket import AF_INET, MSG_WAITALL, SHUT_WR, SOCK_DGRAM, SOCK_STREAM, gethostbyname, socket, timeout
+from ssl import create_default_context
+from typing import Generator, Tuple
+from urllib.request import urlopen
 
 import pytest
+from icmplib import Host, async_ping
 
-_PING_VERIFIER = compile(r"(\d+) packets transmitted, (\d+) packets received, (\d+)% packet loss")
+_SSL_CONTEXT = create_default_context()
 
 logger = getLogger(__name__)
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def random_message() -> Generator[bytes, None, None]:
-    size = randint(64, 128)
-    yield "".join(choice(ascii_letters + digits) for _ in range(size)).encode()
+    yield token_hex(randint(32, 64)).encode()
 
 
 @pytest.fixture(scope="function")
@@ -30,35 +30,37 @@ def caerulean_address() -> Generator[str, None, None]:
         raise RuntimeError("Caerulean IP ('ADDRESS' environmental variable) is not defined!")
 
 
-def _check_ping_output(ping_params: List[str]) -> bool:
-    output = check_output(["ping"] + ping_params).decode().splitlines()
-    if len(output) < 2:
-        return False
-    match = _PING_VERIFIER.fullmatch(output[-2])
-    if match is None:
-        return False
-    packets_sent = int(match.group(1))
-    packets_received = int(match.group(2))
-    packets_loss = int(match.group(3))
-    return (packets_sent == packets_received) and (packets_loss == 0)
+@lru_cache(maxsize=None)
+def _resolve(hostname: str) -> str:
+    return gethostbyname(hostname)
+
+
+async def _ping_hosts(caerulean_address: str) -> Tuple[Host, Host]:
+    return await gather(async_ping(caerulean_address, count=1, payload_size=16), async_ping("8.8.8.8", count=8, interval=0, payload_size=64))
 
 
 @pytest.mark.skipif("CI" in environ, reason="Ping test shouldn't be run in CI environment as most of them don't support PING")
 def test_caerulean_ping(caerulean_address: str) -> None:
     logger.info("Testing with PING porotocol")
-    assert _check_ping_output(["-c", "1", "-s", "16", caerulean_address])
-    assert _check_ping_output(["-c", "8", "-s", "64", "8.8.8.8"])
+    for host in run(_ping_hosts(caerulean_address)):
+        assert host.packets_sent == host.packets_received and host.packet_loss == 0
 
 
 def test_qotd_udp_protocol(random_message: bytes) -> None:
     message_length = 4096
     logger.info(f"Testing with QOTD (UDP) protocol, packets size: {len(random_message)}")
+    address = (_resolve("djxmmx.net"), 17)
     with socket(AF_INET, SOCK_DGRAM) as sock:
+        sock.settimeout(0.5)
+        quote = ""
         # Sometimes the server just doesn't respond :(
         for _ in range(0, 5):
-            sock.sendto(random_message, (gethostbyname("djxmmx.net"), 17))
-            sleep(0.5)
-        quote = sock.recv(message_length).decode()
+            sock.sendto(random_message, address)
+            try:
+                quote = sock.recv(message_length).decode()
+                break
+            except timeout:
+                logger.debug("No quote received, retrying...")
         assert len(quote) > 0
         logger.info(f"Quote received: {quote}")
 
@@ -66,26 +68,32 @@ def test_qotd_udp_protocol(random_message: bytes) -> None:
 def test_tcp_protocol(random_message: bytes) -> None:
     logger.info(f"Testing for TCP protocol, packets size: {len(random_message)}")
     with socket(AF_INET, SOCK_STREAM) as sock:
-        sock.connect((gethostbyname("tcpbin.com"), 4242))
+        sock.connect((_resolve("tcpbin.com"), 4242))
         sock.sendall(random_message)
         sock.shutdown(SHUT_WR)
-        tcp_echo = sock.recv(len(random_message))
-        assert random_message == tcp_echo
+        tcp_echo = bytearray(len(random_message))
+        received = sock.recv_into(tcp_echo, len(tcp_echo), MSG_WAITALL)
+        assert received == len(random_message) and random_message == tcp_echo
 
 
 def test_ftp_protocol() -> None:
     image_size = 1403088
     address = "https://unsplash.com/photos/w7shif_h8hU/download?ixid=M3wxMjA3fDB8MXxhbGx8fHx8fHx8fHwxNjg0NTM0NzM3fA&force=true&w=1920"
     logger.info("Testing with FTP protocol")
-    _, message = urlretrieve(address)
-    assert int(message["Content-Length"]) == image_size
-    logger.info(f"Downloaded image of size {message['Content-Length']}")
+    with urlopen(address, context=_SSL_CONTEXT) as response:
+        chunk, downloaded = bytearray(1 << 16), 0
+        received = response.readinto(chunk)
+        while received > 0:
+            downloaded += received
+            received = response.readinto(chunk)
+    assert int(response.headers["Content-Length"]) == downloaded == image_size
+    logger.info(f"Downloaded image of size {downloaded}")
 
 
 def test_http_protocol() -> None:
     address = "https://example.com/"
     logger.info("Testing with HTTP protocol")
-    response = urlopen(address)
+    response = urlopen(address, context=_SSL_CONTEXT)
     assert response.status == 200
     contents = response.fp.read()
     assert "<h1>Example Domain</h1>" in contents.decode()
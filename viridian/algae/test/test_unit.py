@@ -0,0 +1,67 @@
+from os import urandom
+from typing import Optional
+
+import pytest
+from Crypto.Cipher import ChaCha20_Poly1305
+
+from sources.crypto import (
+    _CHACHA_NONCE_LENGTH,
+    _CHACHA_TAG_LENGTH,
+    _MESSAGE_GRAVITY,
+    _MESSAGE_HEADER_LEN,
+    _MESSAGE_MAX_LEN,
+    Status,
+    decode_message,
+    decrypt_symmetric,
+    encode_message,
+    encrypt_symmetric,
+    initialize_symmetric,
+)
+
+_CHACHA_KEY = urandom(32)
+_MESSAGE_ITERATIONS = 20000
+_MESSAGE_DATA_MAX_LEN = _MESSAGE_MAX_LEN - _MESSAGE_GRAVITY - _MESSAGE_HEADER_LEN
+
+
+@pytest.fixture(scope="function", autouse=True)
+def symmetric_key() -> None:
+    initialize_symmetric(_CHACHA_KEY)
+
+
+@pytest.mark.parametrize("length", [0, _CHACHA_NONCE_LENGTH + _CHACHA_TAG_LENGTH - 1, _CHACHA_NONCE_LENGTH + _CHACHA_TAG_LENGTH, 1500])
+def test_decrypt_symmetric_rejects_malformed(length: int) -> None:
+    with pytest.raises(ValueError):
+        decrypt_symmetric(urandom(length))
+
+
+def test_decrypt_symmetric_rejects_forged() -> None:
+    packet = bytearray(encrypt_symmetric(b"Some data to forge"))
+    packet[-_CHACHA_TAG_LENGTH - 1] ^= 1
+    with pytest.raises(ValueError):
+        decrypt_symmetric(bytes(packet))
+
+
+def test_symmetric_decrypts_pycryptodome() -> None:
+    data, nonce = urandom(1400), urandom(_CHACHA_NONCE_LENGTH)
+    ciphertext, tag = ChaCha20_Poly1305.new(key=_CHACHA_KEY, nonce=nonce).encrypt_and_digest(data)
+    assert decrypt_symmetric(nonce + ciphertext + tag) == data
+
+
+def test_symmetric_encrypts_for_pycryptodome() -> None:
+    data = urandom(1400)
+    packet = encrypt_symmetric(data)
+    nonce, ciphertext, tag = packet[:_CHACHA_NONCE_LENGTH], packet[_CHACHA_NONCE_LENGTH:-_CHACHA_TAG_LENGTH], packet[-_CHACHA_TAG_LENGTH:]
+    assert ChaCha20_Poly1305.new(key=_CHACHA_KEY, nonce=nonce).decrypt_and_verify(ciphertext, tag) == data
+
+
+@pytest.mark.parametrize("data", [None, urandom(64), urandom(_MESSAGE_DATA_MAX_LEN)], ids=["empty", "data", "max"])
+def test_message_round_trip(data: Optional[bytes]) -> None:
+    for _ in range(_MESSAGE_ITERATIONS):
+        message = encode_message(Status.SUCCESS, data)
+        assert len(message) <= _MESSAGE_MAX_LEN
+        assert decode_message(message) == (Status.SUCCESS, data)
+
+
+def test_message_too_long() -> None:
+    with pytest.raises(RuntimeError):
+        encode_message(Status.SUCCESS, urandom(_MESSAGE_DATA_MAX_LEN + 1))